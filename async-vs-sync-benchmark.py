@@ -3,6 +3,7 @@
 ASYNC vs SYNC SCRAPING BENCHMARK
 Compare performance of async vs synchronous scraping approaches
 """
+import array
 import asyncio
 import aiohttp
 import requests
@@ -11,6 +12,7 @@ from urllib3.util.retry import Retry
 import json
 import time
 import random
+import numpy as np
 import psutil
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -18,55 +20,141 @@ from dotenv import load_dotenv
 import os
 from tqdm import tqdm
 import gc
+import atexit
+import functools
 import logging
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
 from datetime import datetime
+from enum import IntEnum
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 load_dotenv()
 
-# Configure logging
+# Use libuv-backed event loop when available (drop-in for asyncio's default loop)
+if uvloop is not None:
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+# Configure logging: records are queued and written by a listener thread, so
+# scraper threads never block on the file/stream handler locks
+log_queue = SimpleQueue()
+log_listener = QueueListener(
+    log_queue,
+    logging.FileHandler(f'async-benchmark-{datetime.now().strftime("%Y%m%d-%H%M%S")}.log'),
+    logging.StreamHandler()
+)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(f'async-benchmark-{datetime.now().strftime("%Y%m%d-%H%M%S")}.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[QueueHandler(log_queue)]
 )
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 
+class Status(IntEnum):
+    FAIL = 0
+    OK = 1
+
+
+# Per-URL results live in one columnar buffer shared by both benchmarks, indexed by URL position
+RESULT_DTYPE = np.dtype([
+    ('status', 'u1'),
+    ('response_time', 'f8'),
+    ('response_size', 'i4'),
+])
+
+
+def draw_simulated_responses(results):
+    """Pre-draw outcomes into the results buffer; return per-URL delays and success flags"""
+    count = len(results)
+    rng = np.random.default_rng()
+    delays = rng.uniform(0.01, 0.03, size=count)
+    ok = rng.random(count) <= 0.90
+    
+    # Outcome decisions are made here in bulk so scrape_url only sleeps and times
+    results['status'] = np.where(ok, Status.OK, Status.FAIL)
+    results['response_size'] = np.where(ok, rng.integers(15000, 45001, size=count), 0)
+    results['response_time'] = 0
+    return delays.tolist(), ok.tolist()
+
+
+_async_session = None
+
+
+async def get_session(concurrency, headers=None):
+    """Return the shared aiohttp session, creating it on first use"""
+    global _async_session
+    if _async_session is None or _async_session.closed:
+        # Cache DNS lookups and reap half-closed sockets instead of re-resolving per connection
+        connector = aiohttp.TCPConnector(
+            limit=concurrency,
+            limit_per_host=max(1, concurrency // 4),
+            ttl_dns_cache=300,
+            use_dns_cache=True,
+            enable_cleanup_closed=True,
+        )
+        _async_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=30),
+            connector=connector,
+            headers=headers,
+        )
+    return _async_session
+
+
+async def close_session():
+    """Close the shared aiohttp session"""
+    global _async_session
+    if _async_session is not None:
+        await _async_session.close()
+        _async_session = None
+
+
 class SystemMonitor:
     def __init__(self):
         self.monitoring = False
-        self.cpu_samples = []
-        self.memory_samples = []
+        self.reset_samples()
         self.start_time = None
+    
+    def reset_samples(self):
+        # One flat float column per metric instead of a dict per sample
+        self.timestamps = array.array('d')
+        self.cpu_samples = array.array('d')
+        self.memory_samples = array.array('d')
+        self.memory_percent_samples = array.array('d')
         
-    def start_monitoring(self):
+    def start_monitoring(self, interval=0.5):
         self.monitoring = True
-        self.start_time = time.time()
-        self.cpu_samples = []
-        self.memory_samples = []
+        self.start_time = time.perf_counter()
+        self.reset_samples()
+        
+        # Prime cpu_percent so each non-blocking call reports usage since the previous sample
+        psutil.cpu_percent(interval=None)
         
         def monitor_loop():
+            # Ticks are scheduled on the monotonic clock so sampling does not drift
+            next_tick = time.monotonic() + interval
             while self.monitoring:
-                cpu = psutil.cpu_percent(interval=0.5)
-                memory = psutil.virtual_memory()
+                time.sleep(max(0, next_tick - time.monotonic()))
+                next_tick += interval
                 
-                timestamp = time.time() - self.start_time
-                
-                self.cpu_samples.append({
-                    'timestamp': timestamp,
-                    'cpu_percent': cpu,
-                })
-                
-                self.memory_samples.append({
-                    'timestamp': timestamp,
-                    'memory_used_gb': memory.used / (1024**3),
-                    'memory_percent': memory.percent
-                })
+                cpu = psutil.cpu_percent(interval=None)
+                memory = psutil.virtual_memory()
                 
-                time.sleep(0.5)
+                self.timestamps.append(time.perf_counter() - self.start_time)
+                self.cpu_samples.append(cpu)
+                self.memory_samples.append(memory.used / (1024**3))
+                self.memory_percent_samples.append(memory.percent)
         
         self.monitor_thread = threading.Thread(target=monitor_loop, daemon=True)
         self.monitor_thread.start()
@@ -80,31 +168,38 @@ class SystemMonitor:
         if not self.cpu_samples:
             return {}
             
-        cpu_values = [s['cpu_percent'] for s in self.cpu_samples]
-        memory_values = [s['memory_used_gb'] for s in self.memory_samples]
+        cpu_values = np.array(self.cpu_samples)
+        memory_values = np.array(self.memory_samples)
         
         return {
-            'cpu_avg': sum(cpu_values) / len(cpu_values),
-            'cpu_max': max(cpu_values),
-            'cpu_min': min(cpu_values),
-            'memory_avg_gb': sum(memory_values) / len(memory_values),
-            'memory_max_gb': max(memory_values),
-            'memory_min_gb': min(memory_values),
-            'sample_count': len(self.cpu_samples),
+            'cpu_avg': float(cpu_values.mean()),
+            'cpu_max': float(cpu_values.max()),
+            'cpu_min': float(cpu_values.min()),
+            'memory_avg_gb': float(memory_values.mean()),
+            'memory_max_gb': float(memory_values.max()),
+            'memory_min_gb': float(memory_values.min()),
+            'sample_count': len(cpu_values),
         }
 
 
 class SyncScraper:
     """Traditional synchronous scraper with threading"""
     
-    def __init__(self):
+    def __init__(self, num_workers=10):
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
         ]
+        self.headers = {
+            'User-Agent': random.choice(self.user_agents),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        }
+        
+        # One session shared by all worker threads so connections are reused across workers
+        self.session = self.create_session(num_workers)
     
-    def create_session(self):
-        """Create optimized session"""
+    def create_session(self, num_workers):
+        """Create optimized session sized for num_workers concurrent threads"""
         session = requests.Session()
         
         retry_strategy = Retry(
@@ -116,66 +211,34 @@ class SyncScraper:
         
         adapter = HTTPAdapter(
             max_retries=retry_strategy,
-            pool_connections=20,
-            pool_maxsize=20
+            pool_connections=num_workers,
+            pool_maxsize=num_workers * 2
         )
         
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         
-        session.headers.update({
-            'User-Agent': random.choice(self.user_agents),
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        })
+        session.headers.update(self.headers)
         
         return session
     
-    def scrape_url(self, url, session):
-        """Scrape single URL"""
-        start_time = time.time()
+    # Hot-path callables are bound as defaults so each call resolves them as fast locals
+    def scrape_url(self, url, session, index, delay, ok, results,
+                   _time=time.perf_counter, _sleep=time.sleep):
+        """Scrape single URL, recording its timing at index in the results buffer"""
+        start_time = _time()
         try:
             # Simulated scraping with realistic delay
-            delay = random.uniform(0.01, 0.03)
-            time.sleep(delay)
+            _sleep(delay)
             
-            # Simulate success/failure
-            if random.random() > 0.90:
-                return {
-                    'url': url,
-                    'status': 'failed',
-                    'response_time': delay,
-                }
-            
-            response_time = time.time() - start_time
-            
-            return {
-                'url': url,
-                'status': 'success',
-                'response_time': response_time,
-                'response_size': random.randint(15000, 45000),
-            }
+            # Failures report the simulated delay, successes the measured time
+            results['response_time'][index] = _time() - start_time if ok else delay
             
         except Exception as e:
             logger.error(f"Error: {e}")
-            return {
-                'url': url,
-                'status': 'failed',
-                'response_time': 0,
-            }
-    
-    def worker_batch(self, urls, worker_id):
-        """Worker function for batch processing"""
-        session = self.create_session()
-        results = []
-        
-        for url in urls:
-            result = self.scrape_url(url, session)
-            result['worker_id'] = worker_id
-            results.append(result)
-        
-        return results
+            results[index] = (Status.FAIL, 0, 0)
     
-    def benchmark(self, urls, num_workers):
+    def benchmark(self, urls, num_workers, results):
         """Run sync benchmark with threading"""
         logger.info(f"\n{'='*80}")
         logger.info(f"SYNC BENCHMARK (Threading)")
@@ -185,65 +248,28 @@ class SyncScraper:
         monitor = SystemMonitor()
         monitor.start_monitoring()
         
-        # Divide URLs among workers
-        urls_per_worker = len(urls) // num_workers
-        worker_tasks = []
-        
-        for i in range(num_workers):
-            start_idx = i * urls_per_worker
-            end_idx = start_idx + urls_per_worker
-            if i == num_workers - 1:
-                end_idx = len(urls)
-            
-            worker_urls = urls[start_idx:end_idx]
-            worker_tasks.append((worker_urls, i))
+        # Draw all random values up front instead of hitting the shared random state per URL
+        delays, ok = draw_simulated_responses(results)
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        # Execute workers with ThreadPoolExecutor
+        # One future per URL: idle threads pull the next URL, so a slow URL never blocks a whole slice
         with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            future_to_worker = {
-                executor.submit(self.worker_batch, task[0], task[1]): task[1]
-                for task in worker_tasks
-            }
-            
-            all_results = []
+            futures = [
+                executor.submit(self.scrape_url, url, self.session, i, delays[i], ok[i], results)
+                for i, url in enumerate(urls)
+            ]
             
-            for future in tqdm(as_completed(future_to_worker), total=len(worker_tasks), desc="Sync Workers"):
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Sync URLs"):
                 try:
-                    results = future.result()
-                    all_results.extend(results)
+                    future.result()
                 except Exception as e:
-                    logger.error(f"Worker failed: {e}")
+                    logger.error(f"Request failed: {e}")
         
-        total_time = time.time() - start_time
+        total_time = time.perf_counter() - start_time
         monitor.stop_monitoring()
         
-        return self.compile_results(all_results, total_time, monitor.get_stats(), "Sync (Threading)")
-
-
-    def compile_results(self, results, total_time, system_stats, method_name):
-        """Compile benchmark results"""
-        successful = [r for r in results if r['status'] == 'success']
-        failed = [r for r in results if r['status'] == 'failed']
-        
-        success_rate = (len(successful) / len(results)) * 100 if results else 0
-        urls_per_second = len(successful) / total_time if total_time > 0 else 0
-        
-        response_times = [r['response_time'] for r in successful if 'response_time' in r]
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0
-        
-        return {
-            'method': method_name,
-            'total_time': total_time,
-            'total_urls': len(results),
-            'successful': len(successful),
-            'failed': len(failed),
-            'success_rate': success_rate,
-            'urls_per_second': urls_per_second,
-            'avg_response_time': avg_response_time,
-            'system_stats': system_stats
-        }
+        return compile_results(results, total_time, monitor.get_stats(), "Sync (Threading)")
 
 
 class AsyncScraper:
@@ -254,100 +280,120 @@ class AsyncScraper:
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
         ]
+        self.headers = {
+            'User-Agent': random.choice(self.user_agents),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        }
     
-    async def scrape_url(self, url, session, semaphore):
-        """Scrape single URL asynchronously"""
-        async with semaphore:
-            start_time = time.time()
-            try:
-                # Simulated async scraping with realistic delay
-                delay = random.uniform(0.01, 0.03)
-                await asyncio.sleep(delay)
-                
-                # Simulate success/failure
-                if random.random() > 0.90:
-                    return {
-                        'url': url,
-                        'status': 'failed',
-                        'response_time': delay,
-                    }
-                
-                response_time = time.time() - start_time
-                
-                return {
-                    'url': url,
-                    'status': 'success',
-                    'response_time': response_time,
-                    'response_size': random.randint(15000, 45000),
-                }
-                
-            except Exception as e:
-                logger.error(f"Error: {e}")
-                return {
-                    'url': url,
-                    'status': 'failed',
-                    'response_time': 0,
-                }
-    
-    async def scrape_batch(self, urls, concurrency):
-        """Scrape batch of URLs asynchronously"""
-        semaphore = asyncio.Semaphore(concurrency)
-        
-        timeout = aiohttp.ClientTimeout(total=30)
-        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=20)
-        
-        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
-            tasks = [self.scrape_url(url, session, semaphore) for url in urls]
+    # Hot-path callables are bound as defaults so each call resolves them as fast locals
+    async def scrape_url(self, url, session, index, delay, ok, results,
+                         _time=time.perf_counter, _sleep=asyncio.sleep):
+        """Scrape single URL asynchronously, recording its timing at index in the results buffer"""
+        start_time = _time()
+        try:
+            # Simulated async scraping with realistic delay
+            await _sleep(delay)
             
-            results = []
-            for coro in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="Async Tasks"):
-                result = await coro
-                results.append(result)
+            # Failures report the simulated delay, successes the measured time
+            results['response_time'][index] = _time() - start_time if ok else delay
             
-            return results
+        except Exception as e:
+            logger.error(f"Error: {e}")
+            results[index] = (Status.FAIL, 0, 0)
     
-    def benchmark(self, urls, concurrency):
+    async def scrape_batch(self, urls, concurrency, results):
+        """Scrape batch of URLs with a fixed pool of worker coroutines"""
+        session = await get_session(concurrency, self.headers)
+        
+        delays, ok = draw_simulated_responses(results)
+        
+        # Workers pull from the queue, so concurrency is bounded by the worker count
+        queue = asyncio.Queue()
+        for item in enumerate(urls):
+            queue.put_nowait(item)
+        
+        completed = 0
+        
+        async def worker():
+            nonlocal completed
+            while True:
+                index, url = await queue.get()
+                try:
+                    await self.scrape_url(url, session, index, delays[index], ok[index], results)
+                    completed += 1
+                finally:
+                    queue.task_done()
+        
+        # No semaphore: the worker count and the connector limit already cap in-flight requests
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(concurrency, len(urls)))]
+        progress = asyncio.ensure_future(self.report_progress(lambda: completed, len(urls)))
+        try:
+            await queue.join()
+        finally:
+            for task in workers + [progress]:
+                task.cancel()
+            await asyncio.gather(*workers, progress, return_exceptions=True)
+    
+    async def run_batch(self, urls, concurrency, results):
+        """Scrape a batch, closing the shared session before the event loop shuts down"""
+        try:
+            await self.scrape_batch(urls, concurrency, results)
+        finally:
+            await close_session()
+    
+    async def report_progress(self, completed, total, interval=0.25):
+        """Tick a progress bar from a completed-count callable"""
+        with tqdm(total=total, desc="Async Tasks") as progress_bar:
+            try:
+                while True:
+                    await asyncio.sleep(interval)
+                    progress_bar.update(completed() - progress_bar.n)
+            finally:
+                progress_bar.update(completed() - progress_bar.n)
+    
+    def benchmark(self, urls, concurrency, results):
         """Run async benchmark"""
         logger.info(f"\n{'='*80}")
         logger.info(f"ASYNC BENCHMARK (asyncio + aiohttp)")
         logger.info(f"URLs: {len(urls)}, Concurrency: {concurrency}")
+        logger.info(f"Event loop: {'uvloop' if uvloop is not None else 'asyncio (default)'}")
         logger.info(f"{'='*80}")
         
         monitor = SystemMonitor()
         monitor.start_monitoring()
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Run async batch
-        results = asyncio.run(self.scrape_batch(urls, concurrency))
+        asyncio.run(self.run_batch(urls, concurrency, results))
         
-        total_time = time.time() - start_time
+        total_time = time.perf_counter() - start_time
         monitor.stop_monitoring()
         
-        return self.compile_results(results, total_time, monitor.get_stats(), "Async (asyncio)")
-    
-    def compile_results(self, results, total_time, system_stats, method_name):
-        """Compile benchmark results"""
-        successful = [r for r in results if r['status'] == 'success']
-        failed = [r for r in results if r['status'] == 'failed']
-        
-        success_rate = (len(successful) / len(results)) * 100 if results else 0
-        urls_per_second = len(successful) / total_time if total_time > 0 else 0
-        
-        response_times = [r['response_time'] for r in successful if 'response_time' in r]
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0
-        
-        return {
-            'method': method_name,
-            'total_time': total_time,
-            'total_urls': len(results),
-            'successful': len(successful),
-            'failed': len(failed),
-            'success_rate': success_rate,
-            'urls_per_second': urls_per_second,
-            'avg_response_time': avg_response_time,
-            'system_stats': system_stats
-        }
+        return compile_results(results, total_time, monitor.get_stats(), "Async (asyncio)")
+
+
+def compile_results(results, total_time, system_stats, method_name):
+    """Compile benchmark results from the columnar results buffer"""
+    ok = results['status'] == Status.OK
+    successful = int(ok.sum())
+    failed = len(results) - successful
+    
+    success_rate = (successful / len(results)) * 100 if len(results) else 0
+    urls_per_second = successful / total_time if total_time > 0 else 0
+    avg_response_time = float(results['response_time'][ok].mean()) if successful else 0
+    
+    return {
+        'method': method_name,
+        'total_time': total_time,
+        'total_urls': len(results),
+        'successful': successful,
+        'failed': failed,
+        'success_rate': success_rate,
+        'urls_per_second': urls_per_second,
+        'avg_response_time': avg_response_time,
+        'system_stats': system_stats
+    }
 
 
 def print_comparison(sync_results, async_results):
@@ -400,12 +446,18 @@ def print_comparison(sync_results, async_results):
     logger.info(f"{'='*80}")
 
 
+@functools.lru_cache(maxsize=None)
+def read_url_cache(path='url_cache.json'):
+    """Parse a URL cache file once per process"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return tuple(orjson.loads(data) if orjson is not None else json.loads(data))
+
+
 def load_or_generate_urls(count=1000):
     """Load URLs from cache or generate new ones"""
     try:
-        with open('url_cache.json', 'r') as f:
-            all_urls = json.load(f)
-        urls = all_urls[:count]
+        urls = list(read_url_cache()[:count])
         logger.info(f"Loaded {len(urls)} URLs from cache")
         return urls
     except FileNotFoundError:
@@ -437,13 +489,16 @@ def main():
     # Load URLs
     urls = load_or_generate_urls(num_urls)
     
+    # One result buffer for both runs; each benchmark overwrites it by URL index
+    results = np.zeros(len(urls), dtype=RESULT_DTYPE)
+    
     # Test 1: Sync scraping with threading
     logger.info("\n" + "="*80)
     logger.info("TEST 1: SYNCHRONOUS SCRAPING (Threading)")
     logger.info("="*80)
     
-    sync_scraper = SyncScraper()
-    sync_results = sync_scraper.benchmark(urls, sync_workers)
+    sync_scraper = SyncScraper(sync_workers)
+    sync_results = sync_scraper.benchmark(urls, sync_workers, results)
     
     logger.info(f"\nSync Results:")
     logger.info(f"  Time: {sync_results['total_time']:.2f}s")
@@ -461,7 +516,7 @@ def main():
     logger.info("="*80)
     
     async_scraper = AsyncScraper()
-    async_results = async_scraper.benchmark(urls, async_concurrency)
+    async_results = async_scraper.benchmark(urls, async_concurrency, results)
     
     logger.info(f"\nAsync Results:")
     logger.info(f"  Time: {async_results['total_time']:.2f}s")
@@ -485,8 +540,12 @@ def main():
     }
     
     filename = f"async-vs-sync-comparison-{int(time.time())}.json"
-    with open(filename, 'w') as f:
-        json.dump(comparison_results, f, indent=2)
+    if orjson is not None:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(comparison_results, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filename, 'w') as f:
+            json.dump(comparison_results, f, indent=2)
     logger.info(f"\nResults saved to: {filename}")
     
     logger.info("\nBENCHMARK COMPLETE")
@@ -3,26 +3,66 @@
 PRODUCTION PREMIUM PROXY SCRAPER
 Ready for real proxy services (SmartProxy, BrightData, etc.)
 """
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import asyncio
+import aiohttp
 import json
+import gzip
 import time
-import random
 import itertools
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 from dotenv import load_dotenv
 import os
+import tempfile
+import io
+from concurrent.futures import ThreadPoolExecutor
 import boto3
+from boto3.s3.transfer import TransferConfig
 from tqdm import tqdm
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 load_dotenv()
 
+# Use libuv-backed event loop when available (drop-in for asyncio's default loop)
+if uvloop is not None:
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+# Retry policy for real proxy requests
+RETRY_TOTAL = 3
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504, 520, 521, 522, 524])
+RETRY_BACKOFF = 2
+
+# In-flight URLs allowed per worker; the whole run shares num_workers * this many slots
+CONCURRENCY_PER_WORKER = 10
+
+# Number of pre-drawn header choices; sessions cycle through them
+CHOICE_POOL_SIZE = 10_000
+
+# Result uploads switch to multipart above 8MB, sending up to 10 parts at once
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=10
+)
+
 class ProductionProxyScraper:
     def __init__(self):
         self.s3_bucket = os.getenv("S3_BUCKET", "my-scraper-results-2025")
         self.aws_region = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
         
+        # S3 uploads run on a background thread so workers never wait on them
+        self._s3 = boto3.client('s3', region_name=self.aws_region)
+        self._upload_pool = ThreadPoolExecutor(max_workers=1)
+        self._pending_uploads = []
+        
         # Premium proxy configurations
         self.proxy_configs = {
             'smartproxy': {
@@ -50,6 +90,8 @@ class ProductionProxyScraper:
         
         # For demo purposes - simulate premium proxy performance
         self.demo_mode = True
+        # Skip the simulated sleeps and report their total instead (set FAST_DEMO=1)
+        self.fast_demo = os.getenv("FAST_DEMO", "0") == "1"
         self.current_proxy_service = 'smartproxy'  # Default
         
         # Advanced user agent rotation
@@ -88,23 +130,56 @@ class ProductionProxyScraper:
             {'country': 'JP', 'lang': 'en-US,en;q=0.9,ja;q=0.1', 'timezone': 'Asia/Tokyo'}
         ]
         
-    def create_premium_session(self, proxy_service='smartproxy', session_id=None):
-        """Create session with premium proxy configuration"""
-        session = requests.Session()
-        
-        # Configure retry strategy for production
-        retry_strategy = Retry(
-            total=3,
-            status_forcelist=[429, 500, 502, 503, 504, 520, 521, 522, 524],
-            allowed_methods=["HEAD", "GET", "OPTIONS"],  # Updated API
-            backoff_factor=2,
-            raise_on_redirect=False,
-            raise_on_status=False
-        )
+        self.client_platforms = ["Windows", "macOS", "Linux"]
+        self.referers = [
+            'https://www.google.com/',
+            'https://www.bing.com/',
+            'https://duckduckgo.com/'
+        ]
+        
+        # Pre-draw header choices in bulk; each session takes the next slot.
+        # A referer index of -1 means no Referer header (30% of sessions)
+        rng = self._rng = np.random.default_rng()
+        self._ua_choices = rng.integers(0, len(self.enterprise_user_agents), CHOICE_POOL_SIZE).tolist()
+        self._geo_choices = rng.integers(0, len(self.geo_regions), CHOICE_POOL_SIZE).tolist()
+        self._platform_choices = rng.integers(0, len(self.client_platforms), CHOICE_POOL_SIZE).tolist()
+        self._referer_choices = np.where(
+            rng.random(CHOICE_POOL_SIZE) > 0.3,
+            rng.integers(0, len(self.referers), CHOICE_POOL_SIZE),
+            -1
+        ).tolist()
+        self._choice_cursor = itertools.count()
+        
+        # Client hints pre-rendered per (user agent, platform); None for non-Chrome agents
+        self._ua_client_hints = [
+            [
+                {
+                    'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+                    'sec-ch-ua-mobile': '?0',
+                    'sec-ch-ua-platform': f'"{platform}"'
+                } if 'Chrome' in ua else None
+                for platform in self.client_platforms
+            ]
+            for ua in self.enterprise_user_agents
+        ]
+        
+        # Static browser headers; sessions copy this and fill in the randomized fields
+        self._base_headers = {
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+            'Cache-Control': 'max-age=0',
+            'DNT': '1',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'none',
+            'Sec-Fetch-User': '?1'
+        }
         
-        adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=100, pool_maxsize=100)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
+    def create_premium_session(self, proxy_service='smartproxy', session_id=None, connector=None):
+        """Create session with premium proxy configuration; returns (session, proxy_url)"""
+        proxy_url = None
         
         # Set up premium proxy
         if not self.demo_mode and proxy_service in self.proxy_configs:
@@ -116,175 +191,298 @@ class ProductionProxyScraper:
             # Add session ID for sticky sessions
             if session_id and proxy_config.get('rotation') == 'sticky_session':
                 proxy_url = f"http://{proxy_config['username']}-session-{session_id}:{proxy_config['password']}@{proxy_config['endpoint']}"
-            
-            session.proxies = {
-                'http': proxy_url,
-                'https': proxy_url
-            }
         
         # Advanced header configuration
-        geo_region = random.choice(self.geo_regions)
-        user_agent = random.choice(self.enterprise_user_agents)
+        choice = next(self._choice_cursor) % CHOICE_POOL_SIZE
+        geo_region = self.geo_regions[self._geo_choices[choice]]
+        ua_index = self._ua_choices[choice]
+        user_agent = self.enterprise_user_agents[ua_index]
         
         # Comprehensive browser headers
-        headers = {
-            'User-Agent': user_agent,
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': geo_region['lang'],
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Cache-Control': 'max-age=0',
-            'DNT': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1'
-        }
+        headers = self._base_headers.copy()
+        headers['User-Agent'] = user_agent
+        headers['Accept-Language'] = geo_region['lang']
         
         # Browser-specific headers
-        if 'Chrome' in user_agent:
-            headers.update({
-                'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-                'sec-ch-ua-mobile': '?0',
-                'sec-ch-ua-platform': f'"{random.choice(["Windows", "macOS", "Linux"])}"'
-            })
+        client_hints = self._ua_client_hints[ua_index][self._platform_choices[choice]]
+        if client_hints:
+            headers.update(client_hints)
         
         # Add referer sometimes
-        if random.random() > 0.3:
-            headers['Referer'] = random.choice([
-                'https://www.google.com/',
-                'https://www.bing.com/',
-                'https://duckduckgo.com/'
-            ])
-        
-        session.headers.update(headers)
-        
-        # Session cookies for persistence
-        session.cookies.set('session_type', 'premium_proxy')
-        session.cookies.set('region', geo_region['country'])
+        referer = self._referer_choices[choice]
+        if referer >= 0:
+            headers['Referer'] = self.referers[referer]
+        
+        session = aiohttp.ClientSession(
+            connector=connector or aiohttp.TCPConnector(limit=200, ttl_dns_cache=300),
+            connector_owner=connector is None,
+            headers=headers,
+            # Session cookies for persistence
+            cookies={'session_type': 'premium_proxy', 'region': geo_region['country']},
+            timeout=aiohttp.ClientTimeout(total=15)
+        )
         
-        return session
+        return session, proxy_url
     
-    def simulate_premium_performance(self, base_success_rate=0.9, base_speed_multiplier=15):
-        """Simulate premium proxy performance characteristics"""
+    async def fetch(self, session, url, proxy=None):
+        """GET url through the proxy, retrying errors and retryable statuses with exponential backoff"""
+        for attempt in range(RETRY_TOTAL + 1):
+            try:
+                response = await session.get(url, proxy=proxy)
+                await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == RETRY_TOTAL:
+                    raise
+            else:
+                if response.status not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+                    return response
+            await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+    
+    def simulate_premium_performance(self, n, base_success_rate=0.9, base_speed_multiplier=15):
+        """Simulate premium proxy performance characteristics for n URLs at once (one array per field)"""
+        rng = self._rng
+        
         # Premium proxies have high success rates but some variation
-        success_probability = base_success_rate + random.uniform(-0.05, 0.05)
+        success_probability = base_success_rate + rng.uniform(-0.05, 0.05, n)
         
         # Speed varies by proxy quality and region
-        speed_multiplier = base_speed_multiplier + random.uniform(-3, 5)
+        speed_multiplier = base_speed_multiplier + rng.uniform(-3, 5, n)
         
-        # Simulate occasional proxy rotation delays
-        rotation_delay = 0
-        if random.random() > 0.85:  # 15% chance of rotation delay
-            rotation_delay = random.uniform(0.5, 2.0)
+        # Simulate occasional proxy rotation delays (15% chance)
+        rotation_delay = np.where(rng.random(n) > 0.85, rng.uniform(0.5, 2.0, n), 0.0)
         
         return success_probability, speed_multiplier, rotation_delay
     
-    def premium_scrape_batch(self, urls, worker_id=0, proxy_service='smartproxy'):
-        """Scrape batch with premium proxy service"""
+    async def premium_scrape_batch(self, urls, worker_id=0, proxy_service='smartproxy', semaphore=None, connector=None, session_pool=None):
+        """Scrape batch with premium proxy service; semaphore, connector and session pool are shared across workers"""
         print(f"🔥 Premium Worker {worker_id} starting {len(urls)} URLs with {proxy_service}")
         
-        # Create premium session
-        session = self.create_premium_session(proxy_service, session_id=f"worker_{worker_id}")
+        # Borrow a pre-built session from the run's pool, or create one for a standalone batch
+        if session_pool is not None:
+            session, proxy_url = await session_pool.get()
+        else:
+            session, proxy_url = self.create_premium_session(proxy_service, session_id=f"worker_{worker_id}", connector=connector)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(CONCURRENCY_PER_WORKER)
         
         successful = 0
         failed = 0
+        completed = 0
         start_time = time.time()
-        details = []
         
-        for i, url in enumerate(urls):
-            try:
-                # Premium proxy characteristics
-                if self.demo_mode:
-                    success_prob, speed_mult, rotation_delay = self.simulate_premium_performance()
-                    
-                    # Simulate faster processing with premium infrastructure
-                    processing_delay = random.uniform(0.1, 0.3)  # Much faster than free
-                    time.sleep(processing_delay + rotation_delay)
-                    
-                    # Simulate high success rate
-                    if random.random() < success_prob:
-                        # Simulate successful response
-                        successful += 1
-                        details.append({
-                            'url': url,
-                            'status': 'success',
-                            'proxy_service': proxy_service,
-                            'simulated': True,
-                            'worker_id': worker_id
-                        })
-                    else:
+        # Per-URL details stream to a local NDJSON file instead of accumulating in memory
+        details = tempfile.NamedTemporaryFile('wb', suffix='.ndjson', delete=False)
+        
+        def record(detail):
+            if orjson is not None:
+                details.write(orjson.dumps(detail) + b"\n")
+            else:
+                details.write(json.dumps(detail).encode() + b"\n")
+        
+        try:
+            # Premium proxy characteristics, drawn for the whole batch up front
+            if self.demo_mode:
+                success_prob, speed_mult, rotation_delay = self.simulate_premium_performance(len(urls))
+                
+                # Simulate faster processing with premium infrastructure
+                processing_delay = self._rng.uniform(0.1, 0.3, len(urls))  # Much faster than free
+                sim_delays = processing_delay + rotation_delay
+                simulated_wall_time = float(sim_delays.sum())
+                sim_delays = sim_delays.tolist()
+                
+                # Simulate high success rate
+                sim_success = (self._rng.random(len(urls)) < success_prob).tolist()
+            
+            async def scrape_one(i, url):
+                nonlocal successful, failed, completed
+                async with semaphore:
+                    try:
+                        if self.demo_mode:
+                            if not self.fast_demo:
+                                await asyncio.sleep(sim_delays[i])
+                            
+                            if sim_success[i]:
+                                # Simulate successful response
+                                successful += 1
+                                record({
+                                    'url': url,
+                                    'status': 'success',
+                                    'proxy_service': proxy_service,
+                                    'simulated': True,
+                                    'worker_id': worker_id
+                                })
+                            else:
+                                failed += 1
+                                record({
+                                    'url': url,
+                                    'status': 'failed',
+                                    'reason': 'simulated_rate_limit',
+                                    'worker_id': worker_id
+                                })
+                                
+                        else:
+                            # Real premium proxy request
+                            response = await self.fetch(session, url, proxy_url)
+                            response.raise_for_status()
+                            # fetch() has already buffered the body; measure bytes, don't decode
+                            body = await response.read()
+                            
+                            if len(body) > 500:
+                                successful += 1
+                                record({
+                                    'url': url,
+                                    'status': 'success',
+                                    'proxy_service': proxy_service,
+                                    'response_size': len(body),
+                                    'worker_id': worker_id
+                                })
+                            else:
+                                failed += 1
+                        
+                    except Exception as e:
                         failed += 1
-                        details.append({
+                        record({
                             'url': url,
                             'status': 'failed',
-                            'reason': 'simulated_rate_limit',
+                            'reason': str(e),
                             'worker_id': worker_id
                         })
-                        
-                else:
-                    # Real premium proxy request
-                    response = session.get(url, timeout=15)
-                    response.raise_for_status()
                     
-                    if len(response.text) > 500:
-                        successful += 1
-                        details.append({
-                            'url': url,
-                            'status': 'success',
-                            'proxy_service': proxy_service,
-                            'response_size': len(response.text),
-                            'worker_id': worker_id
-                        })
-                    else:
-                        failed += 1
-                
-                # Progress reporting
-                if (i + 1) % 10 == 0:
-                    elapsed = time.time() - start_time
-                    rate = (i + 1) / elapsed
-                    print(f"    Worker {worker_id}: {i+1}/{len(urls)} ({rate:.1f}/sec, {successful}/{i+1} success)")
-                
-            except Exception as e:
-                failed += 1
-                details.append({
-                    'url': url,
-                    'status': 'failed',
-                    'reason': str(e),
-                    'worker_id': worker_id
-                })
-        
-        total_time = time.time() - start_time
-        worker_rate = successful / total_time if total_time > 0 else 0
-        
-        result = {
-            'worker_id': worker_id,
-            'proxy_service': proxy_service,
-            'urls_processed': len(urls),
-            'successful': successful,
-            'failed': failed,
-            'processing_time': total_time,
-            'rate': worker_rate,
-            'success_percentage': (successful / len(urls)) * 100,
-            'details': details
-        }
-        
-        print(f"✅ Worker {worker_id} completed: {successful}/{len(urls)} URLs ({worker_rate:.1f}/sec, {result['success_percentage']:.1f}% success)")
+                    # Progress reporting
+                    completed += 1
+                    if completed % 10 == 0:
+                        elapsed = time.time() - start_time
+                        rate = completed / elapsed
+                        print(f"    Worker {worker_id}: {completed}/{len(urls)} ({rate:.1f}/sec, {successful}/{completed} success)")
+            
+            try:
+                await asyncio.gather(*(scrape_one(i, url) for i, url in enumerate(urls)))
+            finally:
+                details.close()
+                if session_pool is not None:
+                    session_pool.put_nowait((session, proxy_url))
+                else:
+                    await session.close()
+            
+            total_time = time.time() - start_time
+            worker_rate = successful / total_time if total_time > 0 else 0
+            
+            result = {
+                'worker_id': worker_id,
+                'proxy_service': proxy_service,
+                'urls_processed': len(urls),
+                'successful': successful,
+                'failed': failed,
+                'processing_time': total_time,
+                'rate': worker_rate,
+                'success_percentage': (successful / len(urls)) * 100,
+                'details_key': f'premium-results/worker-{worker_id}-{proxy_service}-details.ndjson'
+            }
+            if self.demo_mode:
+                result['simulated_wall_time'] = simulated_wall_time
+            
+            print(f"✅ Worker {worker_id} completed: {successful}/{len(urls)} URLs ({worker_rate:.1f}/sec, {result['success_percentage']:.1f}% success)")
+            
+            # Upload to S3 in the background
+            self.submit_upload(self.upload_worker_result, result, details.name)
+        except BaseException:
+            # The upload never got the file; don't leave it behind in the temp dir
+            details.close()
+            os.remove(details.name)
+            raise
         
-        # Upload to S3
+        return result
+    
+    def save_to_s3(self, key, data):
+        """Upload data to S3 as gzip-compressed JSON"""
+        if orjson is not None:
+            body = orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+        else:
+            body = json.dumps(data).encode()
+        
+        self._s3.upload_fileobj(
+            io.BytesIO(gzip.compress(body)),
+            self.s3_bucket,
+            key,
+            ExtraArgs={'ContentType': 'application/json', 'ContentEncoding': 'gzip'},
+            Config=S3_TRANSFER_CONFIG
+        )
+    
+    def upload_worker_result(self, result, details_path):
+        """Upload a single worker's results and its NDJSON details file to S3"""
+        worker_id = result['worker_id']
         try:
-            s3 = boto3.client('s3', region_name=self.aws_region)
-            s3.put_object(
-                Bucket=self.s3_bucket,
-                Key=f'premium-results/worker-{worker_id}-{proxy_service}.json',
-                Body=json.dumps(result, indent=2)
+            self._s3.upload_file(
+                details_path,
+                self.s3_bucket,
+                result['details_key'],
+                ExtraArgs={'ContentType': 'application/x-ndjson'},
+                Config=S3_TRANSFER_CONFIG
             )
+            self.save_to_s3(f'premium-results/worker-{worker_id}-{result["proxy_service"]}.json.gz', result)
             print(f"📊 Worker {worker_id} results uploaded to S3")
         except Exception as e:
             print(f"S3 upload error: {e}")
+        finally:
+            os.remove(details_path)
+    
+    def upload_benchmark_results(self, final_results):
+        """Upload a complete benchmark run's results to S3"""
+        try:
+            self.save_to_s3(f'premium-benchmark-{final_results["proxy_service"]}-{int(time.time())}.json.gz', final_results)
+            print(f"💾 Complete results saved to S3")
+        except Exception as e:
+            print(f"S3 save error: {e}")
+    
+    def submit_upload(self, upload, *args):
+        """Start an S3 upload on the background upload thread"""
+        self._pending_uploads.append(self._upload_pool.submit(upload, *args))
+    
+    def wait_for_uploads(self):
+        """Block until every submitted upload has finished"""
+        for future in self._pending_uploads:
+            future.result()
+        self._pending_uploads.clear()
+    
+    async def run_workers(self, worker_tasks, start_time):
+        """Run every premium worker concurrently on one event loop"""
+        results = []
         
-        return result
+        # Concurrency is a property of the run, not of a worker: every URL competes for the
+        # same slots and connections, so a worker with slow URLs can't strand idle capacity
+        concurrency = len(worker_tasks) * CONCURRENCY_PER_WORKER
+        semaphore = asyncio.Semaphore(concurrency)
+        connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300)
+        
+        # One pre-built session per worker; workers borrow and return them
+        session_pool = asyncio.Queue()
+        for urls, worker_id, proxy_service in worker_tasks:
+            session_pool.put_nowait(self.create_premium_session(proxy_service, session_id=f"worker_{worker_id}", connector=connector))
+        
+        try:
+            for finished in asyncio.as_completed([self._worker_entry(task, semaphore, session_pool) for task in worker_tasks]):
+                result = await finished
+                if result is None:
+                    continue
+                
+                results.append(result)
+                elapsed = time.time() - start_time
+                print(f"  📈 Worker {result['worker_id']} finished ({len(results)}/{len(worker_tasks)}) - {elapsed:.1f}s elapsed")
+        finally:
+            while not session_pool.empty():
+                session, _ = session_pool.get_nowait()
+                await session.close()
+            await connector.close()
+        return results
+    
+    async def _worker_entry(self, task, semaphore, session_pool):
+        """Run one (urls, worker_id, proxy_service) task; returns None if the worker failed"""
+        urls, worker_id, proxy_service = task
+        try:
+            return await self.premium_scrape_batch(urls, worker_id, proxy_service, semaphore, session_pool=session_pool)
+        except Exception as e:
+            print(f"  ❌ Worker {worker_id} failed: {e}")
+            return None
     
     def run_premium_benchmark(self, urls, num_workers=10, proxy_service='smartproxy'):
         """Run production-grade premium proxy benchmark"""
@@ -293,7 +491,8 @@ class ProductionProxyScraper:
         print(f"Service: {proxy_service.title()}")
         print(f"URLs: {len(urls)}")
         print(f"Workers: {num_workers}")
-        print(f"Mode: {'Demo Simulation' if self.demo_mode else 'Real Proxies'}")
+        print(f"Mode: {'Demo Simulation' if self.demo_mode else 'Real Proxies'}{' (fast, no sleeps)' if self.demo_mode and self.fast_demo else ''}")
+        print(f"Event loop: {'uvloop' if uvloop is not None else 'asyncio (default)'}")
         print(f"=" * 50)
         
         # Divide URLs among workers
@@ -314,68 +513,48 @@ class ProductionProxyScraper:
         start_time = time.time()
         
         # Execute with high concurrency (premium proxies can handle it)
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            future_to_worker = {
-                executor.submit(self.premium_scrape_batch, task[0], task[1], task[2]): task[1] 
-                for task in worker_tasks
-            }
-            
-            results = []
-            completed_workers = 0
-            
-            for future in as_completed(future_to_worker):
-                worker_id = future_to_worker[future]
-                try:
-                    result = future.result()
-                    results.append(result)
-                    completed_workers += 1
-                    
-                    elapsed = time.time() - start_time
-                    print(f"  📈 Worker {worker_id} finished ({completed_workers}/{num_workers}) - {elapsed:.1f}s elapsed")
-                    
-                except Exception as e:
-                    print(f"  ❌ Worker {worker_id} failed: {e}")
+        results = asyncio.run(self.run_workers(worker_tasks, start_time))
         
         total_time = time.time() - start_time
         
-        # Aggregate results
-        total_successful = sum(r['successful'] for r in results)
-        total_processed = sum(r['urls_processed'] for r in results)
-        overall_rate = total_successful / total_time if total_time > 0 else 0
+        # FAST_DEMO skips the simulated sleeps, so wall time only measures bookkeeping;
+        # such runs keep their counts but report no rate, speed or cost figures
+        representative = not (self.demo_mode and self.fast_demo)
+        
+        # Aggregate results in one pass
+        total_successful = total_processed = 0
+        for r in results:
+            total_successful += r['successful']
+            total_processed += r['urls_processed']
         overall_success_rate = (total_successful / total_processed) * 100 if total_processed > 0 else 0
         
         final_results = {
             'proxy_service': proxy_service,
             'demo_mode': self.demo_mode,
+            'representative': representative,
             'total_workers': num_workers,
             'total_urls': len(urls),
             'total_processed': total_processed,
             'total_successful': total_successful,
             'total_failed': total_processed - total_successful,
             'total_time_minutes': total_time / 60,
-            'overall_rate': overall_rate,
             'success_percentage': overall_success_rate,
-            'worker_results': results,
-            'cost_estimate': self.calculate_cost_estimate(total_time, num_workers, proxy_service),
-            'performance_vs_free': {
+            'worker_results': results
+        }
+        
+        if representative:
+            overall_rate = total_successful / total_time if total_time > 0 else 0
+            final_results['overall_rate'] = overall_rate
+            final_results['cost_estimate'] = self.calculate_cost_estimate(total_time, num_workers, proxy_service)
+            final_results['performance_vs_free'] = {
                 'speed_improvement': overall_rate / 0.76 if overall_rate > 0 else 0,  # vs your baseline
                 'time_saved_minutes': (len(urls) / 0.76 / 60) - (total_time / 60) if overall_rate > 0 else 0
             }
-        }
         
         self.print_premium_results(final_results)
         
-        # Save comprehensive results
-        try:
-            s3 = boto3.client('s3', region_name=self.aws_region)
-            s3.put_object(
-                Bucket=self.s3_bucket,
-                Key=f'premium-benchmark-{proxy_service}-{int(time.time())}.json',
-                Body=json.dumps(final_results, indent=2)
-            )
-            print(f"💾 Complete results saved to S3")
-        except Exception as e:
-            print(f"S3 save error: {e}")
+        # Save comprehensive results (overlaps with the next benchmark run)
+        self.submit_upload(self.upload_benchmark_results, final_results)
         
         return final_results
     
@@ -423,6 +602,11 @@ class ProductionProxyScraper:
         print(f"   Service: {results['proxy_service'].title()} ({'Simulated' if results['demo_mode'] else 'Real'})")
         print(f"   Workers: {results['total_workers']}")
         print(f"   URLs: {results['total_successful']}/{results['total_processed']} ({results['success_percentage']:.1f}% success)")
+        
+        if not results['representative']:
+            print(f"\n⚠️  FAST_DEMO run: simulated delays were skipped, so rate, speed and cost figures are omitted")
+            return
+        
         print(f"   Rate: {results['overall_rate']:.1f} URLs/second")
         print(f"   Time: {results['total_time_minutes']:.1f} minutes")
         
@@ -481,6 +665,8 @@ def main():
         )
         
         time.sleep(2)  # Brief pause between tests
+    
+    scraper.wait_for_uploads()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,29 +4,53 @@ import psutil
 import asyncio
 from tqdm import tqdm
 from functools import wraps
-from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
 
 # -----------------------------
 # CONFIG
 # -----------------------------
 BASE_URL = "https://webscraper.io"
 MAIN_PAGE = "/test-sites/e-commerce/allinone/computers/laptops"
+MAIN_URL = BASE_URL + MAIN_PAGE
+PROGRESS_EVERY = 16  # product pages per progress bar update
+BS_FETCH_WORKERS = 20  # concurrent product page fetches in bs_scraper
+PLAYWRIGHT_PAGES = 8  # browser pages navigating product links concurrently
 
 # -----------------------------
 # UTILS
 # -----------------------------
+def absolute_url(href):
+    # Product hrefs are root-relative; plain concatenation skips urljoin's parsing
+    return href if href.startswith("http") else BASE_URL + href
+
+def tree_cpu_seconds(process):
+    """CPU seconds (user + system) used so far by the process and its descendants"""
+    times = process.cpu_times()
+    # Browsers and drivers run as child processes: count the ones already reaped
+    # and the ones still running, so Selenium/Playwright aren't scored on Python alone
+    total = times.user + times.system + times.children_user + times.children_system
+    for child in process.children(recursive=True):
+        try:
+            child_times = child.cpu_times()
+        except psutil.Error:
+            continue  # exited between listing and sampling
+        total += child_times.user + child_times.system
+    return total
+
 def measure_resources(func):
+    process = psutil.Process()
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        process = psutil.Process()
         mem_before = process.memory_info().rss
-        cpu_before = psutil.cpu_percent(interval=None)
+        cpu_before = tree_cpu_seconds(process)
         t0 = time.time()
         result = func(*args, **kwargs)
         total_time = time.time() - t0
         mem_after = process.memory_info().rss
-        cpu_after = psutil.cpu_percent(interval=None)
+        cpu_after = tree_cpu_seconds(process)
         mem_used = mem_after - mem_before
+        # CPU seconds spent by this process and its browser/driver children during the call
         cpu_used = cpu_after - cpu_before
         return result, total_time, mem_used, cpu_used
     return wrapper
@@ -37,24 +61,50 @@ def measure_resources(func):
 @measure_resources
 def bs_scraper():
     import requests
+    from requests.adapters import HTTPAdapter
+    try:
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
     from bs4 import BeautifulSoup
 
+    # One keep-alive session for every page, so product pages skip the TCP/TLS handshake
+    sess = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=20)
+    sess.mount("http://", adapter)
+    sess.mount("https://", adapter)
+
     main_t0 = time.time()
-    r = requests.get(urljoin(BASE_URL, MAIN_PAGE))
-    soup = BeautifulSoup(r.text, "html.parser")
+    r = sess.get(MAIN_URL)
+    # selectolax parses the raw bytes in C; fall back to BeautifulSoup + lxml
+    if HTMLParser is not None:
+        hrefs = [a.attributes["href"] for a in HTMLParser(r.content).css(".thumbnail a.title")]
+    else:
+        hrefs = [a["href"] for a in BeautifulSoup(r.content, "lxml").select(".thumbnail a.title")]
     main_time = time.time() - main_t0
 
-    product_links = [
-        urljoin(BASE_URL, a["href"]) for a in soup.select(".thumbnail a.title")
-    ]
+    product_links = [absolute_url(href) for href in hrefs]
 
-    product_times = []
-    for link in tqdm(product_links, desc="BS Products"):
+    def fetch_one(link):
         t0 = time.time()
-        r = requests.get(link)
-        _ = BeautifulSoup(r.text, "html.parser")  # parse product page
-        product_times.append(time.time() - t0)
+        r = sess.get(link)
+        # parse product page
+        if HTMLParser is not None:
+            _ = HTMLParser(r.content)
+        else:
+            _ = BeautifulSoup(r.content, "lxml")
+        return time.time() - t0
 
+    product_times = []
+    with tqdm(total=len(product_links), desc="BS Products", mininterval=0.5) as pbar, \
+            ThreadPoolExecutor(max_workers=BS_FETCH_WORKERS) as ex:
+        for i, elapsed in enumerate(ex.map(fetch_one, product_links), 1):
+            product_times.append(elapsed)
+            if i % PROGRESS_EVERY == 0:
+                pbar.update(PROGRESS_EVERY)
+        pbar.update(len(product_links) % PROGRESS_EVERY)
+
+    sess.close()
     return len(product_links), sum(product_times)
 
 # -----------------------------
@@ -65,7 +115,6 @@ def selenium_scraper(headless=True):
     from selenium import webdriver
     from selenium.webdriver.chrome.service import Service
     from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.common.by import By
 
     options = Options()
     if headless:
@@ -75,15 +124,22 @@ def selenium_scraper(headless=True):
 
     driver = webdriver.Chrome(options=options)
 
-    driver.get(urljoin(BASE_URL, MAIN_PAGE))
-    products = driver.find_elements(By.CSS_SELECTOR, ".thumbnail a.title")
-    product_links = [urljoin(BASE_URL, p.get_attribute("href")) for p in products]
+    driver.get(MAIN_URL)
+    # One script call returns every href instead of a get_attribute round-trip per element
+    hrefs = driver.execute_script(
+        "return Array.from(document.querySelectorAll('.thumbnail a.title'), a => a.getAttribute('href'))"
+    )
+    product_links = [absolute_url(href) for href in hrefs]
 
     product_times = []
-    for link in tqdm(product_links, desc=f"Selenium {'Headless' if headless else 'GUI'} Products"):
-        t0 = time.time()
-        driver.get(link)
-        product_times.append(time.time() - t0)
+    with tqdm(total=len(product_links), desc=f"Selenium {'Headless' if headless else 'GUI'} Products", mininterval=0.5) as pbar:
+        for i, link in enumerate(product_links, 1):
+            t0 = time.time()
+            driver.get(link)
+            product_times.append(time.time() - t0)
+            if i % PROGRESS_EVERY == 0:
+                pbar.update(PROGRESS_EVERY)
+        pbar.update(len(product_links) % PROGRESS_EVERY)
 
     driver.quit()
     return len(product_links), sum(product_times)
@@ -91,27 +147,45 @@ def selenium_scraper(headless=True):
 # -----------------------------
 # PLAYWRIGHT SCRAPER
 # -----------------------------
-@measure_resources
-def playwright_scraper(headless=True):
-    from playwright.sync_api import sync_playwright
+async def _playwright_scrape(headless):
+    from playwright.async_api import async_playwright
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless)
-        page = browser.new_page()
-        page.goto(urljoin(BASE_URL, MAIN_PAGE))
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        pages = [await browser.new_page() for _ in range(PLAYWRIGHT_PAGES)]
+        await pages[0].goto(MAIN_URL)
 
-        products = page.query_selector_all(".thumbnail a.title")
-        product_links = [urljoin(BASE_URL, p.get_attribute("href")) for p in products]
+        hrefs = await pages[0].eval_on_selector_all(
+            ".thumbnail a.title", "els => els.map(e => e.getAttribute('href'))"
+        )
+        product_links = [absolute_url(href) for href in hrefs]
 
-        product_times = []
-        for link in tqdm(product_links, desc=f"Playwright {'Headless' if headless else 'GUI'} Products"):
-            t0 = time.time()
-            page.goto(link)
-            product_times.append(time.time() - t0)
+        # Each page pulls the next link off the queue until it is empty
+        queue = asyncio.Queue()
+        for link in product_links:
+            queue.put_nowait(link)
 
-        browser.close()
+        product_times = []
+        with tqdm(total=len(product_links), desc=f"Playwright {'Headless' if headless else 'GUI'} Products", mininterval=0.5) as pbar:
+            async def visit(page):
+                while not queue.empty():
+                    link = queue.get_nowait()
+                    t0 = time.time()
+                    await page.goto(link)
+                    product_times.append(time.time() - t0)
+                    if len(product_times) % PROGRESS_EVERY == 0:
+                        pbar.update(PROGRESS_EVERY)
+
+            await asyncio.gather(*(visit(page) for page in pages))
+            pbar.update(len(product_links) % PROGRESS_EVERY)
+
+        await browser.close()
         return len(product_links), sum(product_times)
 
+@measure_resources
+def playwright_scraper(headless=True):
+    return asyncio.run(_playwright_scrape(headless))
+
 # -----------------------------
 # RUN BENCHMARKS
 # -----------------------------
@@ -143,7 +217,7 @@ def run_benchmarks():
         print(f"  Main page time: {data['main_page_time']:.2f}s")
         print(f"  Product pages time: {data['product_pages_time']:.2f}s")
         print(f"  Memory used: {data['memory'] / (1024**2):.2f} MB")
-        print(f"  CPU percent delta: {data['cpu']:.2f}%")
+        print(f"  CPU time: {data['cpu']:.2f}s")
         print("")
 
 if __name__ == "__main__":